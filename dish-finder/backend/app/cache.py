@@ -0,0 +1,90 @@
+"""
+Response Cache for Dish Finder
+Serialized search responses in Redis, or in-process when REDIS_URL is unset
+"""
+import hashlib
+import time
+from typing import Optional
+import logging
+
+import orjson
+import redis.asyncio as redis
+from cachetools import LRUCache
+
+from app.config import CACHE_TTL, get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_redis: Optional[redis.Redis] = None
+
+# Fallback store: key -> (expires_at monotonic seconds, payload)
+_local = LRUCache(maxsize=1024)
+
+# Recent hit counts per search key, bounded so long-tail keys fall out
+_search_hits = LRUCache(maxsize=4096)
+
+
+async def init_cache():
+    """Connect to Redis if configured"""
+    global _redis
+
+    if settings.redis_url:
+        _redis = redis.from_url(settings.redis_url)
+        logger.info("✅ Redis response cache enabled")
+    else:
+        logger.info("Using in-process response cache (REDIS_URL not set)")
+
+
+async def close_cache():
+    """Close the Redis connection pool"""
+    global _redis
+
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def search_key(location: str, cuisine: str, mealtime: str) -> str:
+    """Cache key for a search: search:{blake2b-128 of the normalized parameters}"""
+    # Encoded as a JSON array so free-text parts can't run into each other
+    parts = orjson.dumps([location.strip().lower(), cuisine.strip().lower(), mealtime])
+    return f"search:{hashlib.blake2b(parts, digest_size=16).hexdigest()}"
+
+
+def record_hit(key: str):
+    """Count a cache hit for a search key"""
+    _search_hits[key] = _search_hits.get(key, 0) + 1
+
+
+def search_ttl(key: str) -> int:
+    """TTL for a search response: one-off queries expire fast, popular ones live longer"""
+    hits = _search_hits.get(key, 0)
+    return min(CACHE_TTL["search_max"], CACHE_TTL["search"] * (1 + hits))
+
+
+async def get_cached(key: str) -> Optional[bytes]:
+    """Get a cached payload, or None on miss (or if Redis is unreachable)"""
+    if _redis is not None:
+        try:
+            return await _redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Redis GET failed for {key}: {e}")
+            return None
+
+    entry = _local.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+async def set_cached(key: str, payload: bytes, ttl: int):
+    """Cache a payload for ttl seconds"""
+    if _redis is not None:
+        try:
+            await _redis.set(key, payload, ex=ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Redis SET failed for {key}: {e}")
+        return
+
+    _local[key] = (time.monotonic() + ttl, payload)
@@ -2,8 +2,8 @@
 Pydantic Settings for Dish Finder Backend
 """
 from pydantic_settings import BaseSettings
-from functools import lru_cache
-from typing import List
+from functools import cached_property, lru_cache
+from typing import Tuple
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,14 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/dishfinder.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    
+    # Keep the raw TinyFish payload per search (results are always stored normalized)
+    store_raw_response: bool = False
+    
+    # Response cache (in-process when empty)
+    redis_url: str = ""
     
     # Server
     host: str = "0.0.0.0"
@@ -29,11 +37,10 @@ class Settings(BaseSettings):
     max_restaurants: int = 3
     max_dishes_per_restaurant: int = 3
     
-    def get_proxy_list(self) -> List[str]:
-        """Parse comma-separated proxies into a list"""
-        if not self.proxies:
-            return []
-        return [p.strip() for p in self.proxies.split(",") if p.strip()]
+    @cached_property
+    def proxy_list(self) -> Tuple[str, ...]:
+        """Comma-separated proxies, parsed once"""
+        return tuple(p.strip() for p in self.proxies.split(",") if p.strip())
     
     class Config:
         env_file = ".env"
@@ -42,6 +49,15 @@ class Settings(BaseSettings):
         extra = "ignore"  # Ignore extra env vars like VITE_*
 
 
+# Cache TTLs in seconds. Search responses start short and grow with popularity
+# up to search_max; db_cache is how long cache_entries points at a stored search.
+CACHE_TTL = {
+    "search": 120,
+    "search_max": 600,
+    "db_cache": 3600,
+}
+
+
 @lru_cache()
 def get_settings() -> Settings:
     """Cached settings instance"""
@@ -2,24 +2,66 @@
 Database Schema and Repository for Dish Finder
 Using SQLAlchemy async with aiosqlite
 """
+import gzip
+import hashlib
 import os
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, Text, LargeBinary, DateTime, ForeignKey, Index, create_engine, event
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base, relationship, selectinload
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from cachetools import TTLCache
 from sqlalchemy.future import select
-import json
+from sqlalchemy import bindparam, delete, func, insert, lambda_stmt, text
+import orjson
 import logging
 
 from app.config import get_settings
+from app.models import MealTime
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# In-process front for cache_entries lookups: cache_key -> (search_id, expires_at)
+_cache_id_lru = TTLCache(maxsize=1024, ttl=60)
+
 # Create base class for models
 Base = declarative_base()
 
+# Stored ids for meal times - append only, existing rows depend on these values
+MEALTIME_IDS = {
+    MealTime.BREAKFAST.value: 1,
+    MealTime.BRUNCH.value: 2,
+    MealTime.LUNCH.value: 3,
+    MealTime.DINNER.value: 4,
+    MealTime.LATE_NIGHT.value: 5,
+}
+MEALTIME_NAMES = {v: k for k, v in MEALTIME_IDS.items()}
+
+
+class MealTimeId(TypeDecorator):
+    """Meal time stored as a small integer, exposed as its string value"""
+    impl = SmallInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return MEALTIME_IDS[MealTime(value).value]
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Tables created before the switch keep a TEXT column: older rows hold
+            # the name itself, newer ones the id coerced to text ('4')
+            return MEALTIME_NAMES[int(value)] if value.isdigit() else value
+        return MEALTIME_NAMES[value]
+
 
 class SearchRecord(Base):
     """Record of a search request"""
@@ -34,11 +76,31 @@ class SearchRecord(Base):
     longitude = Column(Float, nullable=True)
     source = Column(String(20), default="scrape")  # 'scrape' or 'cache'
     restaurant_count = Column(Integer, default=0)
-    raw_response = Column(Text, nullable=True)  # Store raw TinyFish response
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Stamped in the INSERT by the database (same for every created_at); the SQL
+    # `default` covers older files whose columns have no server_default
+    created_at = Column(DateTime, default=func.current_timestamp(), server_default=func.current_timestamp())
+    
+    # Backs get_recent_searches (ORDER BY created_at DESC LIMIT n)
+    __table_args__ = (
+        Index("ix_search_created", created_at.desc()),
+    )
     
     # Relationships
     restaurants = relationship("Restaurant", back_populates="search_record", cascade="all, delete-orphan")
+    # Never loaded implicitly; use SearchRepository.get_raw_response
+    raw_response = relationship("SearchRawResponse", uselist=False, lazy="noload", cascade="all, delete-orphan")
+
+
+class SearchRawResponse(Base):
+    """Raw TinyFish response for a search, kept apart so search_records rows stay narrow"""
+    __tablename__ = "search_raw_responses"
+    
+    search_id = Column(String(64), ForeignKey("search_records.search_id"), primary_key=True)
+    payload = Column(LargeBinary, nullable=False)  # gzip(orjson) of the response
+    
+    def get_payload(self) -> dict:
+        """Decompress and parse the stored response"""
+        return orjson.loads(gzip.decompress(self.payload))
 
 
 class Restaurant(Base):
@@ -46,7 +108,7 @@ class Restaurant(Base):
     __tablename__ = "restaurants"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    search_id = Column(String(64), ForeignKey("search_records.search_id"), index=True)
+    search_id = Column(String(64), ForeignKey("search_records.search_id"))
     name = Column(String(200), nullable=False)
     address = Column(String(500))
     rating = Column(Float)
@@ -56,13 +118,18 @@ class Restaurant(Base):
     website = Column(String(500))
     hours = Column(String(200))
     cuisine_type = Column(String(100))
-    mealtime = Column(String(50))
+    mealtime = Column(MealTimeId)
     source_url = Column(String(1000))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.current_timestamp(), server_default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_restaurant_search", "search_id", "id"),
+    )
     
     # Relationships
     search_record = relationship("SearchRecord", back_populates="restaurants")
-    dishes = relationship("Dish", back_populates="restaurant", cascade="all, delete-orphan")
+    # lazy="raise": dishes must be eager-loaded (see get_restaurants_with_dishes)
+    dishes = relationship("Dish", back_populates="restaurant", cascade="all, delete-orphan", order_by="Dish.id", lazy="raise")
 
 
 class Dish(Base):
@@ -70,12 +137,16 @@ class Dish(Base):
     __tablename__ = "dishes"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     name = Column(String(200), nullable=False)
     mention_count = Column(Integer, default=1)
     sentiment_score = Column(Float, default=0.5)
     sample_review = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.current_timestamp(), server_default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_dish_restaurant", "restaurant_id", "id"),
+    )
     
     # Relationships
     restaurant = relationship("Restaurant", back_populates="dishes")
@@ -86,10 +157,15 @@ class CacheEntry(Base):
     __tablename__ = "cache_entries"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    cache_key = Column(String(256), unique=True, index=True)  # hash of location+cuisine+mealtime
+    cache_key = Column(String(32), unique=True, index=True)  # blake2b-128 of location+cuisine+mealtime
     search_id = Column(String(64), ForeignKey("search_records.search_id"))
     expires_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.current_timestamp(), server_default=func.current_timestamp())
+    
+    # Covers get_cached_search: key + expiry filter, search_id read from the index
+    __table_args__ = (
+        Index("ix_cache_lookup", "cache_key", "expires_at", "search_id"),
+    )
 
 
 # Database engine and session
@@ -97,6 +173,18 @@ _engine = None
 _async_session_maker = None
 
 
+def _apply_sqlite_pragmas(dbapi_conn, _connection_record):
+    """Tune each new SQLite connection: WAL journal, fewer fsyncs, bigger page cache"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
 async def init_database():
     """Initialize database and create tables"""
     global _engine, _async_session_maker
@@ -111,32 +199,94 @@ async def init_database():
         os.makedirs(db_dir, exist_ok=True)
     
     # Create async engine
+    # aiosqlite defaults to NullPool for file databases, reopening the file
+    # (and its WAL/SHM) and spawning a worker thread per checkout. A bounded
+    # queue pool keeps connections and their page caches alive. SQLite still
+    # serializes writers, so only reads scale across the pool.
+    # Networked databases get pre-ping and a short recycle so stale server-side
+    # connections are replaced before they stall a request.
+    is_sqlite = make_url(settings.database_url).get_backend_name() == "sqlite"
     _engine = create_async_engine(
         settings.database_url,
-        echo=settings.debug,
-        future=True
+        future=True,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=not is_sqlite,
+        pool_recycle=3600 if is_sqlite else 300
     )
     
-    # Create all tables
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    
+    # Create all tables (the connection goes back to the pool warm)
     async with _engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _ensure_indexes(conn)
+        if _engine.dialect.name == "sqlite":
+            await _ensure_dish_fts(conn)
     
     # Create session maker
-    _async_session_maker = sessionmaker(
+    # Repositories flush explicitly where they need generated ids
+    _async_session_maker = async_sessionmaker(
         _engine,
-        class_=AsyncSession,
-        expire_on_commit=False
+        expire_on_commit=False,
+        autoflush=False
     )
     
     logger.info("✅ Database initialized successfully")
 
 
-async def get_session() -> AsyncSession:
-    """Get a database session"""
-    if _async_session_maker is None:
-        await init_database()
+async def _ensure_indexes(conn):
+    """Create any missing indexes on tables that predate them.
     
-    async with _async_session_maker() as session:
+    create_all only emits indexes for tables it creates, so existing
+    database files are brought up to date with CREATE INDEX IF NOT EXISTS.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            await conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+async def _ensure_dish_fts(conn):
+    """Create the FTS5 index over dish names and the triggers that keep it in sync"""
+    result = await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dishes_fts'")
+    )
+    exists = result.first() is not None
+    
+    await conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS dishes_fts USING fts5("
+        "name, content='dishes', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    ))
+    await conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS dishes_fts_ai AFTER INSERT ON dishes BEGIN "
+        "INSERT INTO dishes_fts(rowid, name) VALUES (new.id, new.name); END"
+    ))
+    await conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS dishes_fts_ad AFTER DELETE ON dishes BEGIN "
+        "INSERT INTO dishes_fts(dishes_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+    ))
+    await conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS dishes_fts_au AFTER UPDATE ON dishes BEGIN "
+        "INSERT INTO dishes_fts(dishes_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO dishes_fts(rowid, name) VALUES (new.id, new.name); END"
+    ))
+    
+    if not exists:
+        # Index dishes stored before the FTS table existed
+        await conn.execute(text("INSERT INTO dishes_fts(dishes_fts) VALUES ('rebuild')"))
+
+
+def async_session() -> AsyncSession:
+    """New session for work outside a request (init_database must have run at startup)"""
+    return _async_session_maker()
+
+
+async def get_session() -> AsyncSession:
+    """Get a database session (request dependency)"""
+    async with async_session() as session:
         yield session
 
 
@@ -165,21 +315,33 @@ class SearchRepository:
             latitude=latitude,
             longitude=longitude,
             source=source,
-            restaurant_count=restaurant_count,
-            raw_response=json.dumps(raw_response) if raw_response else None
+            restaurant_count=restaurant_count
         )
+        if raw_response:
+            record.raw_response = SearchRawResponse(
+                payload=gzip.compress(orjson.dumps(raw_response), compresslevel=3)
+            )
         session.add(record)
-        await session.commit()
+        # Flush (not commit) so the row precedes its restaurants; the caller owns the transaction
+        await session.flush()
         return record
     
     @staticmethod
     async def get_search_by_id(session: AsyncSession, search_id: str) -> Optional[SearchRecord]:
         """Get search record by ID"""
-        result = await session.execute(
-            select(SearchRecord).where(SearchRecord.search_id == search_id)
+        # Hot-path SELECTs use lambda_stmt: cached by code location, not rebuilt per call
+        stmt = lambda_stmt(
+            lambda: select(SearchRecord).where(SearchRecord.search_id == bindparam("sid"))
         )
+        result = await session.execute(stmt, {"sid": search_id})
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_raw_response(session: AsyncSession, search_id: str) -> Optional[dict]:
+        """Get the raw TinyFish response stored for a search"""
+        raw = await session.get(SearchRawResponse, search_id)
+        return raw.get_payload() if raw else None
+    
     @staticmethod
     async def get_recent_searches(session: AsyncSession, limit: int = 10) -> List[SearchRecord]:
         """Get recent search records"""
@@ -230,11 +392,25 @@ class RestaurantRepository:
         return restaurant
     
     @staticmethod
-    async def get_restaurants_by_search(session: AsyncSession, search_id: str) -> List[Restaurant]:
-        """Get all restaurants for a search"""
+    async def create_restaurants_bulk(session: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert many restaurants in one statement, returning ids in row order"""
+        if not rows:
+            return []
         result = await session.execute(
-            select(Restaurant).where(Restaurant.search_id == search_id)
+            insert(Restaurant).returning(Restaurant.id, sort_by_parameter_order=True),
+            rows
+        )
+        return [row[0] for row in result]
+    
+    @staticmethod
+    async def get_restaurants_with_dishes(session: AsyncSession, search_id: str) -> List[Restaurant]:
+        """Get all restaurants for a search, with their dishes loaded in one extra query"""
+        stmt = lambda_stmt(
+            lambda: select(Restaurant)
+            .where(Restaurant.search_id == bindparam("sid"))
+            .options(selectinload(Restaurant.dishes))
         )
+        result = await session.execute(stmt, {"sid": search_id})
         return result.scalars().all()
 
 
@@ -262,11 +438,37 @@ class DishRepository:
         await session.flush()
         return dish
     
+    @staticmethod
+    async def create_dishes_bulk(session: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert many dishes in one statement, returning ids in row order"""
+        if not rows:
+            return []
+        result = await session.execute(
+            insert(Dish).returning(Dish.id, sort_by_parameter_order=True),
+            rows
+        )
+        return [row[0] for row in result]
+    
     @staticmethod
     async def get_dishes_by_restaurant(session: AsyncSession, restaurant_id: int) -> List[Dish]:
         """Get all dishes for a restaurant"""
+        stmt = lambda_stmt(
+            lambda: select(Dish).where(Dish.restaurant_id == bindparam("rid"))
+        )
+        result = await session.execute(stmt, {"rid": restaurant_id})
+        return result.scalars().all()
+    
+    @staticmethod
+    async def search_by_name(session: AsyncSession, q: str, limit: int = 20) -> List[Dish]:
+        """Full-text search dish names (SQLite FTS5), best matches first"""
+        # Quote as a single FTS phrase so user input can't inject query syntax
+        phrase = '"' + q.replace('"', '""') + '"'
         result = await session.execute(
-            select(Dish).where(Dish.restaurant_id == restaurant_id)
+            select(Dish).from_statement(text(
+                "SELECT d.* FROM dishes d JOIN dishes_fts f ON d.id = f.rowid "
+                "WHERE dishes_fts MATCH :q ORDER BY f.rank LIMIT :limit"
+            )),
+            {"q": phrase, "limit": limit}
         )
         return result.scalars().all()
 
@@ -277,9 +479,8 @@ class CacheRepository:
     @staticmethod
     def generate_cache_key(location: str, cuisine: str, mealtime: str) -> str:
         """Generate a cache key from search parameters"""
-        import hashlib
-        key_string = f"{location.lower().strip()}:{cuisine.lower().strip()}:{mealtime.lower().strip()}"
-        return hashlib.sha256(key_string.encode()).hexdigest()[:64]
+        key = f"{location.lower().strip()}|{cuisine.lower().strip()}|{mealtime.lower().strip()}".encode()
+        return hashlib.blake2b(key, digest_size=16).hexdigest()
     
     @staticmethod
     async def get_cached_search(
@@ -289,17 +490,35 @@ class CacheRepository:
         mealtime: str
     ) -> Optional[str]:
         """Get cached search_id if exists and not expired"""
+        entry = await CacheRepository.get_cached_entry(session, location, cuisine, mealtime)
+        return entry[0] if entry else None
+    
+    @staticmethod
+    async def get_cached_entry(
+        session: AsyncSession, 
+        location: str, 
+        cuisine: str, 
+        mealtime: str
+    ) -> Optional[Tuple[str, datetime]]:
+        """Get (search_id, expires_at) of an unexpired cache entry"""
         cache_key = CacheRepository.generate_cache_key(location, cuisine, mealtime)
+        now = datetime.utcnow()
         
-        result = await session.execute(
-            select(CacheEntry)
-            .where(CacheEntry.cache_key == cache_key)
-            .where(CacheEntry.expires_at > datetime.utcnow())
+        hit = _cache_id_lru.get(cache_key)
+        if hit and hit[1] > now:
+            return hit
+        
+        stmt = lambda_stmt(
+            lambda: select(CacheEntry)
+            .where(CacheEntry.cache_key == bindparam("key"))
+            .where(CacheEntry.expires_at > bindparam("now"))
         )
+        result = await session.execute(stmt, {"key": cache_key, "now": now})
         entry = result.scalar_one_or_none()
         
         if entry:
-            return entry.search_id
+            hit = _cache_id_lru[cache_key] = (entry.search_id, entry.expires_at)
+            return hit
         return None
     
     @staticmethod
@@ -309,13 +528,12 @@ class CacheRepository:
         cuisine: str,
         mealtime: str,
         search_id: str,
-        ttl_hours: int = 1
-    ):
-        """Set cache entry for search results"""
-        from datetime import timedelta
-        
+        ttl_seconds: int = 3600
+    ) -> datetime:
+        """Set cache entry for search results, returning when it expires"""
         cache_key = CacheRepository.generate_cache_key(location, cuisine, mealtime)
-        expires_at = datetime.utcnow() + timedelta(hours=ttl_hours)
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        _cache_id_lru.pop(cache_key, None)
         
         # Check if entry exists
         result = await session.execute(
@@ -334,4 +552,12 @@ class CacheRepository:
             )
             session.add(entry)
         
-        await session.commit()
+        return expires_at
+    
+    @staticmethod
+    async def prune_expired(session: AsyncSession) -> int:
+        """Delete expired cache entries, returning how many were removed"""
+        result = await session.execute(
+            delete(CacheEntry).where(CacheEntry.expires_at < datetime.utcnow())
+        )
+        return result.rowcount
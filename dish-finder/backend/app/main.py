@@ -2,14 +2,20 @@
 Dish Finder Backend - FastAPI Application
 Web scraping service using TinyFish AI for Google Maps restaurant discovery
 """
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
+from app.cache import init_cache, close_cache
 from app.config import get_settings
-from app.database import init_database
+from app import database
+from app.database import init_database, async_session, CacheRepository
+from app.middleware import SSEAwareGZipMiddleware
 from app.routes import router
+from app.services.tinyfish import tinyfish_service
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +26,25 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+# SQL statement logging in debug mode; formatting is skipped when the level filters it out
+if settings.debug:
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+CACHE_PRUNE_INTERVAL = 300  # seconds
+
+
+async def _prune_loop():
+    """Periodically delete expired cache entries so lookups don't walk dead rows"""
+    while True:
+        await asyncio.sleep(CACHE_PRUNE_INTERVAL)
+        try:
+            async with async_session() as session, session.begin():
+                removed = await CacheRepository.prune_expired(session)
+            if removed:
+                logger.info(f"Pruned {removed} expired cache entries")
+        except Exception as e:
+            logger.warning(f"Cache prune failed: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,12 +52,20 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Dish Finder Backend...")
     await init_database()
+    assert database._async_session_maker is not None
+    await init_cache()
+    prune_task = asyncio.create_task(_prune_loop())
     logger.info("✅ Application started successfully")
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down Dish Finder Backend...")
+    prune_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await prune_task
+    await close_cache()
+    await tinyfish_service.aclose()
 
 
 # Create FastAPI app
@@ -59,7 +92,8 @@ app = FastAPI(
     3. Use `/api/v1/search/stream` for real-time progress updates
     """,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -71,6 +105,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses, never SSE (added last so it wraps CORS and sees final headers)
+app.add_middleware(SSEAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routes
 app.include_router(router)
 
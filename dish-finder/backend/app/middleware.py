@@ -0,0 +1,39 @@
+"""
+ASGI middleware for Dish Finder Backend
+"""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+
+class _SkipEventStreamResponder(GZipResponder):
+    """GZipResponder that passes text/event-stream responses through untouched"""
+
+    passthrough = False
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.passthrough = content_type.startswith("text/event-stream")
+        if self.passthrough:
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
+
+
+class SSEAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZip responses except Server-Sent Events, which would otherwise be
+    buffered by the compressor instead of reaching the client frame by frame.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = _SkipEventStreamResponder(
+                    self.app, self.minimum_size, compresslevel=self.compresslevel
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
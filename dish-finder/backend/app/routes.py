@@ -2,34 +2,135 @@
 API Routes for Dish Finder
 """
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-import uuid
-import json
+from typing import List, Optional
+import secrets
 import logging
 
+import orjson
+
 from app.models import (
     SearchRequest, 
     SearchResponse, 
     RestaurantResult,
+    DishInfo,
     SearchHistoryItem
 )
 from app.database import (
+    async_session,
     get_session,
+    Restaurant,
     SearchRepository,
     RestaurantRepository,
     DishRepository,
     CacheRepository
 )
-from app.services.tinyfish import tinyfish_service
+from app.cache import get_cached, set_cached, search_key, search_ttl, record_hit
+from app.config import CACHE_TTL, get_settings
+from app.services.tinyfish import tinyfish_service, OPENTABLE_URL
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 router = APIRouter(prefix="/api/v1", tags=["search"])
 
+# Pre-encoded SSE frames for /search/stream (search ids are hex, safe to splice)
+_STARTED_TMPL = b'data: {"type":"STARTED","search_id":"%b"}\n\n'
+_RESULT_TMPL = b'data: {"type":"RESULT","data":%b}\n\n'
+
+# The response cache holds only the request-independent fields; a hit wraps
+# them (minus their opening brace) with the caller's own query
+_CACHED_FIELDS = {"search_id", "restaurants", "scraped_at"}
+_CACHE_HIT_TMPL = b'{"success":true,"source":"cache","query":%b,"message":"Results from cache",%b'
+
+
+async def _store_restaurants(
+    session: AsyncSession,
+    search_id: str,
+    restaurants: List[RestaurantResult]
+):
+    """Persist scraped restaurants and their dishes with one INSERT per table"""
+    restaurant_ids = await RestaurantRepository.create_restaurants_bulk(session, [
+        {
+            "search_id": search_id,
+            "name": r.name,
+            "address": r.address,
+            "rating": r.rating,
+            "total_reviews": r.total_reviews,
+            "price_level": r.price_level,
+            "phone": r.phone,
+            "website": r.website,
+            "hours": r.hours,
+            "cuisine_type": r.cuisine_type,
+            "mealtime": r.mealtime,
+            "source_url": r.source_url
+        }
+        for r in restaurants
+    ])
+    
+    await DishRepository.create_dishes_bulk(session, [
+        {
+            "restaurant_id": restaurant_id,
+            "name": dish.name,
+            "mention_count": dish.mention_count,
+            "sentiment_score": dish.sentiment_score,
+            "sample_review": dish.sample_review
+        }
+        for r, restaurant_id in zip(restaurants, restaurant_ids)
+        for dish in r.top_dishes
+    ])
+
+
+def _restaurant_from_row(r: Restaurant) -> RestaurantResult:
+    """Build a response model from a stored row without re-validating it"""
+    return RestaurantResult.model_construct(
+        name=r.name,
+        address=r.address,
+        rating=r.rating,
+        total_reviews=r.total_reviews,
+        price_level=r.price_level,
+        phone=r.phone,
+        website=r.website,
+        hours=r.hours,
+        top_dishes=[
+            DishInfo.model_construct(
+                name=d.name,
+                mention_count=d.mention_count,
+                sentiment_score=d.sentiment_score,
+                sample_review=d.sample_review
+            )
+            for d in r.dishes
+        ],
+        cuisine_type=r.cuisine_type,
+        mealtime=r.mealtime,
+        source_url=r.source_url
+    )
+
+
+def _query(request: SearchRequest) -> dict:
+    """The query echoed back in a search response"""
+    return {
+        "mealtime": request.mealtime.value,
+        "cuisine": request.cuisine,
+        "location": request.location
+    }
+
+
+def _encode_response(response: SearchResponse, include: Optional[set] = None) -> bytes:
+    """JSON body of a search response, shared by the response cache and SSE RESULT frames"""
+    return response.model_dump_json(include=include).encode()
+
 
-@router.post("/search", response_model=SearchResponse)
+async def _cache_response(key: str, response: SearchResponse, expires_at: datetime):
+    """Cache the request-independent part of a response, no longer than its cache_entries row lives"""
+    ttl = min(search_ttl(key), int((expires_at - datetime.utcnow()).total_seconds()))
+    if ttl > 0:
+        await set_cached(key, _encode_response(response, _CACHED_FIELDS), ttl=ttl)
+
+
+@router.post("/search", response_model=SearchResponse, response_class=ORJSONResponse)
 async def search_restaurants(
     request: SearchRequest,
     session: AsyncSession = Depends(get_session)
@@ -44,66 +145,58 @@ async def search_restaurants(
     
     Returns structured data with top 3 restaurants and their most mentioned dishes.
     """
-    search_id = str(uuid.uuid4())[:12]
+    search_id = secrets.token_hex(6)
     
     try:
-        # Check cache first
-        cached_search_id = await CacheRepository.get_cached_search(
+        # Serialized responses first: a hit skips the database entirely
+        cache_key = search_key(request.location, request.cuisine, request.mealtime.value)
+        cached_body = await get_cached(cache_key)
+        if cached_body:
+            logger.info(f"Response cache hit for {request.cuisine} near {request.location}")
+            record_hit(cache_key)
+            return Response(
+                content=_CACHE_HIT_TMPL % (orjson.dumps(_query(request)), cached_body[1:]),
+                media_type="application/json"
+            )
+        
+        # Then the database cache
+        cached_entry = await CacheRepository.get_cached_entry(
             session,
             request.location,
             request.cuisine,
             request.mealtime.value
         )
         
-        if cached_search_id:
+        if cached_entry:
+            cached_search_id, expires_at = cached_entry
             logger.info(f"Cache hit for {request.cuisine} near {request.location}")
+            record_hit(cache_key)
             
             # Get cached results
             cached_record = await SearchRepository.get_search_by_id(session, cached_search_id)
             if cached_record:
-                cached_restaurants = await RestaurantRepository.get_restaurants_by_search(
+                cached_restaurants = await RestaurantRepository.get_restaurants_with_dishes(
                     session, cached_search_id
                 )
                 
                 # Build response from cache
-                restaurant_results = []
-                for r in cached_restaurants:
-                    dishes = await DishRepository.get_dishes_by_restaurant(session, r.id)
-                    restaurant_results.append(RestaurantResult(
-                        name=r.name,
-                        address=r.address,
-                        rating=r.rating,
-                        total_reviews=r.total_reviews,
-                        price_level=r.price_level,
-                        phone=r.phone,
-                        website=r.website,
-                        hours=r.hours,
-                        top_dishes=[{
-                            "name": d.name,
-                            "mention_count": d.mention_count,
-                            "sentiment_score": d.sentiment_score,
-                            "sample_review": d.sample_review
-                        } for d in dishes],
-                        cuisine_type=r.cuisine_type,
-                        mealtime=r.mealtime,
-                        source_url=r.source_url
-                    ))
+                restaurant_results = [_restaurant_from_row(r) for r in cached_restaurants]
                 
-                return SearchResponse(
+                response = SearchResponse(
                     success=True,
                     source="cache",
                     search_id=cached_search_id,
-                    query={
-                        "mealtime": request.mealtime.value,
-                        "cuisine": request.cuisine,
-                        "location": request.location
-                    },
+                    query=_query(request),
                     restaurants=restaurant_results,
                     scraped_at=cached_record.created_at,
                     message="Results from cache"
                 )
+                await _cache_response(cache_key, response, expires_at)
+                return response
+        
+        # No cache - release the pooled connection while the (slow) scrape runs
+        await session.close()
         
-        # No cache - scrape using Yutori
         logger.info(f"Scraping {request.cuisine} restaurants near {request.location} for {request.mealtime.value}")
         
         # Use SSE streaming and collect final result
@@ -131,9 +224,7 @@ async def search_restaurants(
             )
         
         # Parse the scraped results
-        source_url = tinyfish_service._build_opentable_url(
-            request.cuisine, request.location
-        )
+        source_url = OPENTABLE_URL
         
         restaurants = tinyfish_service.parse_scrape_result(
             final_result,
@@ -142,74 +233,43 @@ async def search_restaurants(
             source_url
         )
         
-        # Store in database
-        search_record = await SearchRepository.create_search(
-            session=session,
-            search_id=search_id,
-            mealtime=request.mealtime.value,
-            cuisine=request.cuisine,
-            location=request.location,
-            latitude=request.latitude,
-            longitude=request.longitude,
-            source="scrape",
-            restaurant_count=len(restaurants),
-            raw_response=final_result
-        )
-        
-        # Store restaurants and dishes
-        for r in restaurants:
-            db_restaurant = await RestaurantRepository.create_restaurant(
+        # Store search, restaurants, dishes and cache entry in one transaction
+        async with session.begin():
+            await SearchRepository.create_search(
                 session=session,
                 search_id=search_id,
-                name=r.name,
-                address=r.address,
-                rating=r.rating,
-                total_reviews=r.total_reviews,
-                price_level=r.price_level,
-                phone=r.phone,
-                website=r.website,
-                hours=r.hours,
-                cuisine_type=r.cuisine_type,
-                mealtime=r.mealtime,
-                source_url=r.source_url
+                mealtime=request.mealtime.value,
+                cuisine=request.cuisine,
+                location=request.location,
+                latitude=request.latitude,
+                longitude=request.longitude,
+                source="scrape",
+                restaurant_count=len(restaurants),
+                raw_response=final_result if settings.store_raw_response else None
             )
             
-            # Store dishes
-            for dish in r.top_dishes:
-                await DishRepository.create_dish(
-                    session=session,
-                    restaurant_id=db_restaurant.id,
-                    name=dish.name,
-                    mention_count=dish.mention_count,
-                    sentiment_score=dish.sentiment_score,
-                    sample_review=dish.sample_review
-                )
-        
-        await session.commit()
-        
-        # Update cache
-        await CacheRepository.set_cache(
-            session,
-            request.location,
-            request.cuisine,
-            request.mealtime.value,
-            search_id,
-            ttl_hours=1
-        )
+            await _store_restaurants(session, search_id, restaurants)
+            
+            expires_at = await CacheRepository.set_cache(
+                session,
+                request.location,
+                request.cuisine,
+                request.mealtime.value,
+                search_id,
+                ttl_seconds=CACHE_TTL["db_cache"]
+            )
         
-        return SearchResponse(
+        response = SearchResponse(
             success=True,
             source="scrape",
             search_id=search_id,
-            query={
-                "mealtime": request.mealtime.value,
-                "cuisine": request.cuisine,
-                "location": request.location
-            },
+            query=_query(request),
             restaurants=restaurants,
             scraped_at=datetime.utcnow(),
             message=f"Found {len(restaurants)} restaurants"
         )
+        await _cache_response(cache_key, response, expires_at)
+        return response
         
     except HTTPException:
         raise
@@ -222,21 +282,18 @@ async def search_restaurants(
 
 
 @router.post("/search/stream")
-async def search_restaurants_stream(
-    request: SearchRequest,
-    session: AsyncSession = Depends(get_session)
-):
+async def search_restaurants_stream(request: SearchRequest):
     """
     Search for restaurants with real-time progress streaming.
     
     Returns Server-Sent Events (SSE) with progress updates and final results.
     """
     async def generate():
-        search_id = str(uuid.uuid4())[:12]
+        search_id = secrets.token_hex(6)
         
         try:
             # Send start event
-            yield f"data: {json.dumps({'type': 'STARTED', 'search_id': search_id})}\n\n"
+            yield _STARTED_TMPL % search_id.encode()
             
             # Stream Yutori events
             final_result = None
@@ -247,16 +304,14 @@ async def search_restaurants_stream(
                 mealtime=request.mealtime.value
             ):
                 # Forward progress events
-                yield f"data: {json.dumps(event)}\n\n"
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
                 
                 if event.get("type") == "COMPLETE":
                     final_result = event.get("resultJson", {})
             
             if final_result:
                 # Parse and send final structured result
-                source_url = tinyfish_service._build_opentable_url(
-                    request.cuisine, request.location
-                )
+                source_url = OPENTABLE_URL
                 
                 restaurants = tinyfish_service.parse_scrape_result(
                     final_result,
@@ -265,8 +320,8 @@ async def search_restaurants_stream(
                     source_url
                 )
                 
-                # Store in database (get a fresh session)
-                async for db_session in get_session():
+                # Store in database (the stream outlives any request-scoped session)
+                async with async_session() as db_session, db_session.begin():
                     await SearchRepository.create_search(
                         session=db_session,
                         search_id=search_id,
@@ -275,59 +330,27 @@ async def search_restaurants_stream(
                         location=request.location,
                         source="scrape",
                         restaurant_count=len(restaurants),
-                        raw_response=final_result
+                        raw_response=final_result if settings.store_raw_response else None
                     )
                     
-                    for r in restaurants:
-                        db_restaurant = await RestaurantRepository.create_restaurant(
-                            session=db_session,
-                            search_id=search_id,
-                            name=r.name,
-                            address=r.address,
-                            rating=r.rating,
-                            total_reviews=r.total_reviews,
-                            price_level=r.price_level,
-                            phone=r.phone,
-                            website=r.website,
-                            hours=r.hours,
-                            cuisine_type=r.cuisine_type,
-                            mealtime=r.mealtime,
-                            source_url=r.source_url
-                        )
-                        
-                        for dish in r.top_dishes:
-                            await DishRepository.create_dish(
-                                session=db_session,
-                                restaurant_id=db_restaurant.id,
-                                name=dish.name,
-                                mention_count=dish.mention_count,
-                                sentiment_score=dish.sentiment_score,
-                                sample_review=dish.sample_review
-                            )
-                    
-                    await db_session.commit()
-                    break
+                    await _store_restaurants(db_session, search_id, restaurants)
                 
                 # Send final result
                 response = SearchResponse(
                     success=True,
                     source="scrape",
                     search_id=search_id,
-                    query={
-                        "mealtime": request.mealtime.value,
-                        "cuisine": request.cuisine,
-                        "location": request.location
-                    },
+                    query=_query(request),
                     restaurants=restaurants,
                     scraped_at=datetime.utcnow(),
                     message=f"Found {len(restaurants)} restaurants"
                 )
                 
-                yield f"data: {json.dumps({'type': 'RESULT', 'data': response.model_dump(mode='json')})}\n\n"
+                yield _RESULT_TMPL % _encode_response(response)
             
         except Exception as e:
             logger.exception(f"Stream search failed: {e}")
-            yield f"data: {json.dumps({'type': 'ERROR', 'message': str(e)})}\n\n"
+            yield b"data: " + orjson.dumps({"type": "ERROR", "message": str(e)}) + b"\n\n"
     
     return StreamingResponse(
         generate(),
@@ -339,7 +362,7 @@ async def search_restaurants_stream(
     )
 
 
-@router.get("/search/{search_id}", response_model=SearchResponse)
+@router.get("/search/{search_id}", response_model=SearchResponse, response_class=ORJSONResponse)
 async def get_search_result(
     search_id: str,
     session: AsyncSession = Depends(get_session)
@@ -350,30 +373,9 @@ async def get_search_result(
     if not record:
         raise HTTPException(status_code=404, detail="Search not found")
     
-    restaurants = await RestaurantRepository.get_restaurants_by_search(session, search_id)
+    restaurants = await RestaurantRepository.get_restaurants_with_dishes(session, search_id)
     
-    restaurant_results = []
-    for r in restaurants:
-        dishes = await DishRepository.get_dishes_by_restaurant(session, r.id)
-        restaurant_results.append(RestaurantResult(
-            name=r.name,
-            address=r.address,
-            rating=r.rating,
-            total_reviews=r.total_reviews,
-            price_level=r.price_level,
-            phone=r.phone,
-            website=r.website,
-            hours=r.hours,
-            top_dishes=[{
-                "name": d.name,
-                "mention_count": d.mention_count,
-                "sentiment_score": d.sentiment_score,
-                "sample_review": d.sample_review
-            } for d in dishes],
-            cuisine_type=r.cuisine_type,
-            mealtime=r.mealtime,
-            source_url=r.source_url
-        ))
+    restaurant_results = [_restaurant_from_row(r) for r in restaurants]
     
     return SearchResponse(
         success=True,
@@ -390,7 +392,7 @@ async def get_search_result(
     )
 
 
-@router.get("/history", response_model=list[SearchHistoryItem])
+@router.get("/history", response_model=list[SearchHistoryItem], response_class=ORJSONResponse)
 async def get_search_history(
     limit: int = 10,
     session: AsyncSession = Depends(get_session)
@@ -0,0 +1,35 @@
+"""
+Shared fixtures for Dish Finder backend tests
+"""
+import sqlite3
+
+import pytest
+
+from app import database
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def seed_sql():
+    """SQL run against the database file before init_database (override to fake an older schema)"""
+    return ""
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch, seed_sql):
+    """Initialized database on a temporary file; yields its path"""
+    path = tmp_path / "dishfinder.db"
+    if seed_sql:
+        with sqlite3.connect(path) as conn:
+            conn.executescript(seed_sql)
+    
+    monkeypatch.setattr(database.settings, "database_url", f"sqlite+aiosqlite:///{path}")
+    await database.init_database()
+    yield path
+    
+    await database._engine.dispose()
+    database._cache_id_lru.clear()
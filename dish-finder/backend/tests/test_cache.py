@@ -0,0 +1,39 @@
+"""
+Tests for the search response cache
+"""
+import pytest
+
+from app import cache
+from app.config import CACHE_TTL
+
+pytestmark = pytest.mark.anyio
+
+
+def test_search_key_normalizes_input():
+    assert cache.search_key(" Austin ", "THAI", "dinner") == cache.search_key("austin", "thai", "dinner")
+
+
+def test_search_key_separates_free_text_parts():
+    assert cache.search_key("a:b", "c", "dinner") != cache.search_key("a", "b:c", "dinner")
+    assert cache.search_key("a|b", "c", "dinner") != cache.search_key("a", "b|c", "dinner")
+
+
+def test_search_ttl_grows_with_hits_up_to_max():
+    key = cache.search_key("ttl-test", "thai", "dinner")
+    assert cache.search_ttl(key) == CACHE_TTL["search"]
+    
+    cache.record_hit(key)
+    assert cache.search_ttl(key) == 2 * CACHE_TTL["search"]
+    
+    for _ in range(100):
+        cache.record_hit(key)
+    assert cache.search_ttl(key) == CACHE_TTL["search_max"]
+
+
+async def test_local_cache_round_trip_and_expiry():
+    await cache.set_cached("search:live", b"{}", ttl=60)
+    await cache.set_cached("search:dead", b"{}", ttl=-1)
+    
+    assert await cache.get_cached("search:live") == b"{}"
+    assert await cache.get_cached("search:dead") is None
+    assert await cache.get_cached("search:missing") is None
@@ -0,0 +1,169 @@
+"""
+Tests for the database layer: storage formats and repositories
+"""
+import sqlite3
+
+import pytest
+
+from app import database
+from app.database import CacheRepository, DishRepository, RestaurantRepository, SearchRepository
+
+pytestmark = pytest.mark.anyio
+
+# restaurants as created before mealtime was stored as an integer
+LEGACY_RESTAURANTS = """
+CREATE TABLE restaurants (
+    id INTEGER NOT NULL,
+    search_id VARCHAR(64),
+    name VARCHAR(200) NOT NULL,
+    address VARCHAR(500),
+    rating FLOAT,
+    total_reviews INTEGER,
+    price_level VARCHAR(10),
+    phone VARCHAR(50),
+    website VARCHAR(500),
+    hours VARCHAR(200),
+    cuisine_type VARCHAR(100),
+    mealtime VARCHAR(50),
+    source_url VARCHAR(1000),
+    created_at DATETIME,
+    PRIMARY KEY (id)
+);
+INSERT INTO restaurants (id, search_id, name, mealtime) VALUES (1, 's1', 'Old', 'lunch');
+"""
+
+# dishes rows stored before the FTS index existed
+LEGACY_DISHES = """
+CREATE TABLE dishes (
+    id INTEGER NOT NULL,
+    restaurant_id INTEGER,
+    name VARCHAR(200) NOT NULL,
+    mention_count INTEGER,
+    sentiment_score FLOAT,
+    sample_review TEXT,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+);
+INSERT INTO dishes (id, restaurant_id, name) VALUES (1, 1, 'Crème Brûlée'), (2, 1, 'Pad Thai');
+"""
+
+
+def _restaurant(name: str, mealtime: str) -> dict:
+    return {"search_id": "s1", "name": name, "address": "1 Main St", "mealtime": mealtime}
+
+
+async def _mealtimes(search_id: str) -> list:
+    async with database.async_session() as session:
+        rows = await RestaurantRepository.get_restaurants_with_dishes(session, search_id)
+    return [r.mealtime for r in sorted(rows, key=lambda r: r.id)]
+
+
+async def test_mealtime_stored_as_integer(db):
+    async with database.async_session() as session, session.begin():
+        await RestaurantRepository.create_restaurants_bulk(session, [_restaurant("New", "dinner")])
+    
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT typeof(mealtime), mealtime FROM restaurants").fetchone() == ("integer", 4)
+    assert await _mealtimes("s1") == ["dinner"]
+
+
+@pytest.mark.parametrize("seed_sql", [LEGACY_RESTAURANTS], ids=["legacy"])
+async def test_mealtime_on_legacy_text_column(db):
+    async with database.async_session() as session, session.begin():
+        await RestaurantRepository.create_restaurants_bulk(session, [_restaurant("New", "dinner")])
+    
+    with sqlite3.connect(db) as conn:
+        stored = conn.execute("SELECT mealtime FROM restaurants ORDER BY id").fetchall()
+    assert stored == [("lunch",), ("4",)]
+    assert await _mealtimes("s1") == ["lunch", "dinner"]
+
+
+async def test_cache_entry_expiry(db):
+    async with database.async_session() as session, session.begin():
+        await CacheRepository.set_cache(session, "94105", "Thai", "dinner", "s1", ttl_seconds=60)
+        await CacheRepository.set_cache(session, "10001", "Thai", "dinner", "s2", ttl_seconds=-60)
+    
+    async with database.async_session() as session:
+        assert await CacheRepository.get_cached_search(session, " 94105", "thai", "dinner") == "s1"
+        assert await CacheRepository.get_cached_search(session, "10001", "Thai", "dinner") is None
+    
+    async with database.async_session() as session, session.begin():
+        assert await CacheRepository.prune_expired(session) == 1
+
+
+async def test_bulk_insert_returns_ids_in_row_order(db):
+    async with database.async_session() as session, session.begin():
+        restaurant_ids = await RestaurantRepository.create_restaurants_bulk(
+            session, [_restaurant(f"R{i}", "lunch") for i in range(5)]
+        )
+        await DishRepository.create_dishes_bulk(session, [
+            {"restaurant_id": restaurant_id, "name": f"R{i} dish {j}"}
+            for i, restaurant_id in enumerate(restaurant_ids)
+            for j in range(3)
+        ])
+    
+    async with database.async_session() as session:
+        rows = await RestaurantRepository.get_restaurants_with_dishes(session, "s1")
+    
+    by_id = {r.id: r for r in rows}
+    for i, restaurant_id in enumerate(restaurant_ids):
+        assert by_id[restaurant_id].name == f"R{i}"
+        assert [d.name for d in by_id[restaurant_id].dishes] == [f"R{i} dish {j}" for j in range(3)]
+
+
+async def test_bulk_insert_empty(db):
+    async with database.async_session() as session:
+        assert await RestaurantRepository.create_restaurants_bulk(session, []) == []
+        assert await DishRepository.create_dishes_bulk(session, []) == []
+
+
+async def test_raw_response_stored_gzipped(db):
+    raw = {"restaurants": [{"name": "Café", "popular_dishes": ["Pho"] * 50}]}
+    async with database.async_session() as session, session.begin():
+        await SearchRepository.create_search(
+            session, "s1", "dinner", "Vietnamese", "94105", raw_response=raw
+        )
+        await SearchRepository.create_search(session, "s2", "dinner", "Vietnamese", "94105")
+    
+    with sqlite3.connect(db) as conn:
+        payload, = conn.execute("SELECT payload FROM search_raw_responses WHERE search_id = 's1'").fetchone()
+    assert payload[:2] == b"\x1f\x8b"  # gzip magic
+    
+    async with database.async_session() as session:
+        assert await SearchRepository.get_raw_response(session, "s1") == raw
+        assert await SearchRepository.get_raw_response(session, "s2") is None
+
+
+async def _dish_search(q: str) -> list:
+    async with database.async_session() as session:
+        return [d.name for d in await DishRepository.search_by_name(session, q)]
+
+
+async def test_dish_fts_follows_inserts_updates_and_deletes(db):
+    async with database.async_session() as session, session.begin():
+        ids = await DishRepository.create_dishes_bulk(session, [
+            {"restaurant_id": 1, "name": "Green Curry"},
+            {"restaurant_id": 1, "name": "Red Curry"},
+            {"restaurant_id": 1, "name": "Mango Sticky Rice"},
+        ])
+    assert sorted(await _dish_search("curry")) == ["Green Curry", "Red Curry"]
+    
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE dishes SET name = 'Yellow Curry' WHERE id = ?", (ids[0],))
+        conn.execute("DELETE FROM dishes WHERE id = ?", (ids[1],))
+    assert await _dish_search("curry") == ["Yellow Curry"]
+    assert await _dish_search("green") == []
+
+
+async def test_dish_fts_quotes_user_input(db):
+    async with database.async_session() as session, session.begin():
+        await DishRepository.create_dishes_bulk(session, [{"restaurant_id": 1, "name": "Fish and Chips"}])
+    # Operators and stray quotes are plain words inside the phrase
+    assert await _dish_search('fish AND "chips') == ["Fish and Chips"]
+    assert await _dish_search("chips OR fish") == []
+
+
+@pytest.mark.parametrize("seed_sql", [LEGACY_DISHES], ids=["legacy"])
+async def test_dish_fts_indexes_existing_rows(db):
+    assert await _dish_search("creme brulee") == ["Crème Brûlée"]
+    assert await _dish_search("pad thai") == ["Pad Thai"]
@@ -0,0 +1,137 @@
+"""
+Tests for the search API routes, with TinyFish replaced by a canned result
+"""
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app import cache, database
+from app.main import app
+from app.services.tinyfish import tinyfish_service
+
+RESULT = {"restaurants": [
+    {
+        "name": f"R{i}",
+        "address": f"{i} Main St",
+        "rating": 4.5,
+        "review_count": 10,
+        "price_level": "$$",
+        "popular_dishes": [f"D{i}{j}" for j in range(3)]
+    }
+    for i in range(3)
+]}
+
+SEARCH = {"mealtime": "dinner", "cuisine": "Italian", "location": "94105"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "dishfinder.db"
+
+
+@pytest.fixture
+def client(db_path, monkeypatch):
+    async def fake_call(url, goal, proxy_override=None):
+        return orjson.loads(orjson.dumps(RESULT))
+    
+    monkeypatch.setattr(database.settings, "database_url", f"sqlite+aiosqlite:///{db_path}")
+    monkeypatch.setattr(tinyfish_service, "_call_tinyfish_sse", fake_call)
+    with TestClient(app) as c:
+        yield c
+    
+    cache._local.clear()
+    cache._search_hits.clear()
+    database._cache_id_lru.clear()
+
+
+def _stream_events(response) -> list:
+    return [orjson.loads(frame[6:]) for frame in response.content.split(b"\n\n") if frame.startswith(b"data: ")]
+
+
+def test_search_then_cache_hits(client):
+    scraped = client.post("/api/v1/search", json=SEARCH).json()
+    assert scraped["source"] == "scrape"
+    assert [r["name"] for r in scraped["restaurants"]] == ["R0", "R1", "R2"]
+    # Null fields are part of the contract
+    assert scraped["restaurants"][0]["phone"] is None
+    
+    cached = client.post("/api/v1/search", json=SEARCH).json()
+    assert cached["source"] == "cache"
+    assert cached["restaurants"] == scraped["restaurants"]
+    
+    # Response cache gone: served from the database cache instead
+    cache._local.clear()
+    from_db = client.post("/api/v1/search", json=SEARCH).json()
+    assert from_db["source"] == "cache"
+    assert from_db["restaurants"] == scraped["restaurants"]
+
+
+def test_cache_hits_echo_the_callers_query(client):
+    first = {**SEARCH, "cuisine": "THAI", "location": " Austin "}
+    second = {**SEARCH, "cuisine": "thai", "location": "austin"}
+    scraped = client.post("/api/v1/search", json=first).json()
+    
+    cached = client.post("/api/v1/search", json=second).json()
+    assert cached["source"] == "cache"
+    assert cached.keys() == scraped.keys()
+    assert cached["query"] == {"mealtime": "dinner", "cuisine": "thai", "location": "austin"}
+    assert cached["search_id"] == scraped["search_id"]
+    assert cached["restaurants"] == scraped["restaurants"]
+    
+    cache._local.clear()
+    from_db = client.post("/api/v1/search", json=second).json()
+    assert from_db["source"] == "cache"
+    assert from_db["query"] == cached["query"]
+
+
+def test_response_cache_never_outlives_db_entry(client, db_path):
+    client.post("/api/v1/search", json=SEARCH)
+    expires_at = datetime.utcnow() + timedelta(seconds=30)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE cache_entries SET expires_at = ?", (expires_at.isoformat(" "),))
+    cache._local.clear()
+    database._cache_id_lru.clear()
+    
+    assert client.post("/api/v1/search", json=SEARCH).json()["source"] == "cache"
+    key = cache.search_key(SEARCH["location"], SEARCH["cuisine"], SEARCH["mealtime"])
+    assert cache._local[key][0] - time.monotonic() <= 30
+
+
+def test_stream_matches_search_payload(client):
+    response = client.post("/api/v1/search/stream", json=SEARCH)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    
+    events = _stream_events(response)
+    assert events[0]["type"] == "STARTED"
+    assert events[-1]["type"] == "RESULT"
+    streamed = events[-1]["data"]
+    
+    stored = client.get(f"/api/v1/search/{streamed['search_id']}").json()
+    assert stored.keys() == streamed.keys()
+    assert stored["restaurants"] == streamed["restaurants"]
+
+
+def test_unknown_search_id(client):
+    assert client.get("/api/v1/search/missing").status_code == 404
+
+
+def test_json_responses_are_gzipped(client):
+    search_id = client.post("/api/v1/search", json=SEARCH).json()["search_id"]
+    response = client.get(f"/api/v1/search/{search_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+
+
+def test_tinyfish_client_survives_app_restart(db_path, monkeypatch):
+    monkeypatch.setattr(database.settings, "database_url", f"sqlite+aiosqlite:///{db_path}")
+    for _ in range(2):
+        with TestClient(app):
+            http_client = tinyfish_service._get_client()
+            assert not http_client.is_closed
+    # Shutdown closes the client it opened
+    assert http_client.is_closed
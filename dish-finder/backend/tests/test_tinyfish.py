@@ -0,0 +1,135 @@
+"""
+Tests for the TinyFish service: SSE parsing and scrape result handling
+"""
+import httpx
+import pytest
+
+from app.services.tinyfish import TinyFishService, _iter_sse_data
+
+pytestmark = pytest.mark.anyio
+
+EVENTS = (
+    b'data: {"type":"STARTED"}\n\n'
+    b'data: {"type":"PROGRESS"}\n\n'
+    b'data: {"type":"PROGRESS","purpose":"Clicking"}\n\n'
+    b': keepalive\n\n'
+    b'data: not json\n\n'
+    b'data: {"type":"COMPLETE","status":"COMPLETED","resultJson":{"restaurants":[{"name":"Caf\xc3\xa9"}]}}\n\n'
+)
+
+PAYLOADS = [
+    b'{"type":"STARTED"}',
+    b'{"type":"PROGRESS"}',
+    b'{"type":"PROGRESS","purpose":"Clicking"}',
+    b'not json',
+    b'{"type":"COMPLETE","status":"COMPLETED","resultJson":{"restaurants":[{"name":"Caf\xc3\xa9"}]}}',
+]
+
+
+def _chunked(body: bytes, size: int):
+    async def gen():
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+    return gen()
+
+
+def _service(body: bytes, size: int) -> TinyFishService:
+    service = TinyFishService()
+    service._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=_chunked(body, size)))
+    )
+    return service
+
+
+# Chunk sizes split frames, CRLF pairs and multi-byte UTF-8 at different points
+@pytest.mark.parametrize("size", [1, 2, 7, 9, len(EVENTS) * 2])
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"], ids=["lf", "crlf"])
+async def test_iter_sse_data(size, newline):
+    body = EVENTS.replace(b"\n", newline)
+    response = httpx.Response(200, content=_chunked(body, size))
+    assert [p async for p in _iter_sse_data(response)] == PAYLOADS
+
+
+async def test_client_reopens_after_aclose():
+    service = TinyFishService()
+    first = service._get_client()
+    assert service._get_client() is first
+    
+    await service.aclose()
+    assert first.is_closed
+    
+    second = service._get_client()
+    assert second is not first and not second.is_closed
+    await service.aclose()
+
+@pytest.mark.parametrize("chunks, ready_after", [
+    ([b'data: {"a":1}\r\n\r', b'\n', b': keepalive\n'], 2),
+    ([b'data: {"a":1}\r', b'\n\r\n', b': keepalive\n'], 2),
+    ([b'data: {"a":1}\n', b'\n', b': keepalive\n'], 2),
+], ids=["cr-lf-split", "crlf-split", "lf-split"])
+async def test_iter_sse_data_yields_each_frame_once_complete(chunks, ready_after):
+    pulled = []
+    
+    async def gen():
+        for chunk in chunks:
+            pulled.append(chunk)
+            yield chunk
+    
+    response = httpx.Response(200, content=gen())
+    async for payload in _iter_sse_data(response):
+        assert payload == b'{"a":1}'
+        # Yielded as soon as its terminator arrived, not at end of stream
+        assert len(pulled) == ready_after
+        break
+
+
+async def test_iter_sse_data_unterminated_last_frame():
+    response = httpx.Response(200, content=_chunked(b'data: {"a":1}\n\ndata: {"b":2}', 4))
+    assert [p async for p in _iter_sse_data(response)] == [b'{"a":1}', b'{"b":2}']
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"], ids=["lf", "crlf"])
+async def test_call_tinyfish_sse_returns_complete_result(newline):
+    service = _service(EVENTS.replace(b"\n", newline), 5)
+    try:
+        result = await service._call_tinyfish_sse("https://example.com", "goal")
+    finally:
+        await service.aclose()
+    assert result == {"restaurants": [{"name": "Café"}]}
+
+
+async def test_call_tinyfish_sse_raises_on_error_event():
+    service = _service(b'data: {"type":"ERROR","message":"blocked"}\n\n', 64)
+    try:
+        with pytest.raises(Exception, match="blocked"):
+            await service._call_tinyfish_sse("https://example.com", "goal")
+    finally:
+        await service.aclose()
+
+
+def test_aggregate_dishes_merges_repeats():
+    raw = ["Pad Thai", {"name": "Green Curry"}, "pad thai ", 42, "Som Tum", "PAD THAI"]
+    dishes = TinyFishService._aggregate_dishes(raw, 3)
+    assert [(d.name, d.mention_count) for d in dishes] == [
+        ("Pad Thai", 3), ("Green Curry", 1), ("Som Tum", 1)
+    ]
+    assert TinyFishService._aggregate_dishes(raw, 2)[1].name == "Green Curry"
+
+
+def test_aggregate_dishes_sums_counts_and_averages_sentiment():
+    raw = [
+        {"name": "Khao Soi", "mention_count": 4, "sentiment_score": 0.9},
+        {"name": "khao soi", "mention_count": 2, "sentiment_score": 0.5},
+        {"name": "Larb", "mention_count": "many", "sentiment_score": None},
+    ]
+    khao_soi, larb = TinyFishService._aggregate_dishes(raw, 3)
+    assert (khao_soi.name, khao_soi.mention_count) == ("Khao Soi", 6)
+    assert khao_soi.sentiment_score == pytest.approx(0.7)
+    assert (larb.mention_count, larb.sentiment_score) == (1, 0.8)
+
+
+def test_aggregate_dishes_without_repeats_keeps_order():
+    dishes = TinyFishService._aggregate_dishes(["A", "B", "C", "D"], 3)
+    assert [(d.name, d.mention_count, d.sentiment_score) for d in dishes] == [
+        ("A", 1, 0.8), ("B", 1, 0.8), ("C", 1, 0.8)
+    ]